@@ -4479,6 +4479,7 @@ def _send_invite_for_email(email_data, detected_slot) -> bool:
         import base64
         from datetime import datetime, timedelta
         from ics_utils import build_meeting_invite_ics
+        from timezone_utils import ensure_utc, parse_iso
 
         # Candidate email
         cand_email = (email_data.get("from_email") or email_data.get("sender") or "").strip()
@@ -4520,20 +4521,18 @@ def _send_invite_for_email(email_data, detected_slot) -> bool:
             st.error("Detected slot missing start time.")
             return False
 
+        # Convert ISO strings to datetime if needed; offsets are converted to
+        # UTC rather than dropped, naive values are taken as UTC
+        if not isinstance(start_utc, datetime):
+            start_utc = parse_iso(str(start_utc))
+        start_utc = ensure_utc(start_utc)
+
         # If end isn't provided, compute it
         if not end_utc:
-            if isinstance(start_utc, datetime):
-                end_utc = start_utc + timedelta(minutes=duration_minutes)
-            else:
-                # fallback: try parsing ISO
-                parsed_start = datetime.fromisoformat(str(start_utc).replace("Z", "+00:00")).replace(tzinfo=None)
-                end_utc = parsed_start + timedelta(minutes=duration_minutes)
-
-        # Convert ISO strings to datetime if needed
-        if isinstance(start_utc, str):
-            start_utc = datetime.fromisoformat(start_utc.replace("Z", "+00:00")).replace(tzinfo=None)
-        if isinstance(end_utc, str):
-            end_utc = datetime.fromisoformat(end_utc.replace("Z", "+00:00")).replace(tzinfo=None)
+            end_utc = start_utc + timedelta(minutes=duration_minutes)
+        elif not isinstance(end_utc, datetime):
+            end_utc = parse_iso(str(end_utc))
+        end_utc = ensure_utc(end_utc)
 
         # Candidate name extraction (optional)
         candidate_name = _ensure_candidate_name("", cand_email)
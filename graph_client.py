@@ -1,13 +1,82 @@
+import base64
+import json
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from orjson import dumps as _dumps
+except ImportError:
+    # orjson is in requirements.txt; this only keeps partial installs
+    # working. allow_nan=False matches what requests' json= did.
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
 
 GRAPH_BASE = "https://graph.microsoft.com/v1.0"
+GRAPH_BATCH_LIMIT = 20
+GRAPH_TIMEOUT = (5, 30)  # (connect, read) seconds
+# Throttled (429) and unavailable (503) requests were not processed by
+# Graph, so resending them cannot duplicate a sendMail.
+GRAPH_RETRY_STATUSES = (429, 503)
+GRAPH_MAX_RETRIES = 3
+# Total seconds one client call may spend sleeping on throttling, shared by
+# every retry it makes (including $batch sub-request retries).
+GRAPH_RETRY_BUDGET = 60
+# Raw + base64 bytes held by one client's attachment cache.
+GRAPH_ATTACHMENT_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def _wait_for_retry(retry_after, attempt: int, deadline: float) -> bool:
+    # Honour Retry-After (seconds) when Graph sends it, else back off.
+    # Returns False without sleeping if the wait would overrun the deadline.
+    try:
+        delay = max(float(retry_after), 0.0)
+    except (TypeError, ValueError):
+        delay = 0.5 * 2 ** attempt
+    if time.monotonic() + delay > deadline:
+        return False
+    time.sleep(delay)
+    return True
+
+
+def _batch_result(status, error) -> dict:
+    ok = status in (200, 201, 202)
+    return {"success": ok, "status_code": status, "error": None if ok else error}
+
+
+def _response_json(r):
+    try:
+        return r.json()
+    except ValueError:
+        return r.text
+
+
+class GraphError(Exception):
+    # The Graph error payload (parsed JSON, or raw text if it isn't JSON) is
+    # kept on .response_json rather than in the message so large error
+    # bodies are not copied into every log line.
+    def __init__(
+        self,
+        message: str,
+        status_code: int = None,
+        response_json=None,
+        results: list = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response_json = response_json
+        # Per-message outcomes from send_mail_batch, so callers can tell
+        # which messages were already delivered.
+        self.results = results
 
 
-class GraphAPIError(Exception):
+class GraphAPIError(GraphError):
     pass
 
 
-class GraphAuthError(Exception):
+class GraphAuthError(GraphError):
     pass
 
 
@@ -21,22 +90,95 @@ class GraphConfig:
 class GraphClient:
     def __init__(self, access_token: str):
         self.access_token = access_token
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=50))
+        self._attachment_cache = {}
+        self._attachment_cache_bytes = 0
 
-    def _headers(self):
-        return {
-            "Authorization": f"Bearer {self.access_token}",
+    def close(self):
+        self.clear_attachment_cache()
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def access_token(self) -> str:
+        return self._access_token
+
+    @access_token.setter
+    def access_token(self, value: str):
+        # Rebuild the cached headers whenever the token is rotated.
+        self._access_token = value
+        self._cached_headers = {
+            "Authorization": f"Bearer {value}",
             "Content-Type": "application/json"
         }
 
-    def send_mail(
+    def _headers(self):
+        return self._cached_headers
+
+    def _post(self, url: str, body: dict, deadline: float = None):
+        if deadline is None:
+            deadline = time.monotonic() + GRAPH_RETRY_BUDGET
+        data = _dumps(body)
+        headers = self._headers()
+        for attempt in range(GRAPH_MAX_RETRIES + 1):
+            r = self._session.post(url, headers=headers, data=data, timeout=GRAPH_TIMEOUT)
+            if (
+                r.status_code not in GRAPH_RETRY_STATUSES
+                or attempt == GRAPH_MAX_RETRIES
+                or not _wait_for_retry(r.headers.get("Retry-After"), attempt, deadline)
+            ):
+                return r
+
+    def prepare_attachment(self, name: str, content_type: str, raw_bytes: bytes) -> dict:
+        """
+        Build a sendMail attachment dict, reusing the base64 encoding when
+        the same file is attached to several messages from this client.
+        """
+        if not isinstance(raw_bytes, bytes):
+            # bytearray/memoryview are not hashable; encode without caching
+            # rather than copying them into a key.
+            encoded = base64.b64encode(raw_bytes).decode("ascii")
+        else:
+            # pop + reinsert keeps the dict in least-recently-used order
+            encoded = self._attachment_cache.pop(raw_bytes, None)
+            if encoded is not None:
+                self._attachment_cache[raw_bytes] = encoded
+            else:
+                encoded = base64.b64encode(raw_bytes).decode("ascii")
+                self._cache_attachment(raw_bytes, encoded)
+
+        return {"name": name, "contentType": content_type, "contentBytes": encoded}
+
+    def _cache_attachment(self, raw_bytes: bytes, encoded: str):
+        size = len(raw_bytes) + len(encoded)
+        if size > GRAPH_ATTACHMENT_CACHE_BYTES:
+            return
+        # Evict least recently used entries until the new one fits.
+        while self._attachment_cache_bytes + size > GRAPH_ATTACHMENT_CACHE_BYTES:
+            old_raw = next(iter(self._attachment_cache))
+            old_encoded = self._attachment_cache.pop(old_raw)
+            self._attachment_cache_bytes -= len(old_raw) + len(old_encoded)
+        self._attachment_cache[raw_bytes] = encoded
+        self._attachment_cache_bytes += size
+
+    def clear_attachment_cache(self):
+        self._attachment_cache.clear()
+        self._attachment_cache_bytes = 0
+
+    def _build_mail_payload(
         self,
-        sender_email: str,
         to_emails: list,
         subject: str,
         html_body: str,
         attachments: list = None,
         cc_emails: list = None
-    ):
+    ) -> dict:
         if attachments is None:
             attachments = []
 
@@ -61,14 +203,134 @@ class GraphClient:
             },
             "saveToSentItems": True
         }
+        return payload
+
+    def send_mail(
+        self,
+        sender_email: str,
+        to_emails: list,
+        subject: str,
+        html_body: str,
+        attachments: list = None,
+        cc_emails: list = None
+    ):
+        payload = self._build_mail_payload(
+            to_emails, subject, html_body, attachments, cc_emails
+        )
 
         url = f"{GRAPH_BASE}/users/{sender_email}/sendMail"
-        r = requests.post(url, headers=self._headers(), json=payload)
+        r = self._post(url, payload)
 
         if r.status_code in (401, 403):
-            raise GraphAuthError(f"Graph auth error {r.status_code}: {r.text}")
+            raise GraphAuthError(f"Graph auth error {r.status_code}", r.status_code, _response_json(r))
 
         if r.status_code not in (200, 201, 202):
-            raise GraphAPIError(f"Graph sendMail failed {r.status_code}: {r.text}")
+            raise GraphAPIError(f"Graph sendMail failed {r.status_code}", r.status_code, _response_json(r))
 
         return {"success": True, "status_code": r.status_code}
+
+    def send_mail_batch(self, sender_email: str, messages: list) -> list:
+        """
+        Send many messages via the Graph $batch endpoint, 20 per request.
+
+        Each item in `messages` takes the same keyword arguments as
+        send_mail (minus sender_email); malformed messages raise before
+        anything is sent. Returns one result per message, in order. Every
+        chunk is attempted even if an earlier one fails, including on
+        connection errors or unparseable responses; throttled sub-requests
+        (429/503) are resent after their Retry-After. If any message still failed, GraphAuthError/GraphAPIError is raised
+        at the end with the full per-message list on `e.results`, so a
+        retry can resend only the failed ones.
+        """
+        results = [None] * len(messages)
+        url = f"{GRAPH_BASE}/$batch"
+        deadline = time.monotonic() + GRAPH_RETRY_BUDGET
+
+        # Build every payload up front so a malformed message fails the call
+        # before anything has been sent.
+        sub_requests = [
+            {
+                "id": str(i),
+                "method": "POST",
+                "url": f"/users/{sender_email}/sendMail",
+                "body": self._build_mail_payload(**m),
+                "headers": {"Content-Type": "application/json"}
+            }
+            for i, m in enumerate(messages)
+        ]
+
+        for offset in range(0, len(sub_requests), GRAPH_BATCH_LIMIT):
+            pending = {
+                req["id"]: req for req in sub_requests[offset:offset + GRAPH_BATCH_LIMIT]
+            }
+
+            for attempt in range(GRAPH_MAX_RETRIES + 1):
+                try:
+                    r = self._post(url, {"requests": list(pending.values())}, deadline)
+                    if r.status_code == 200:
+                        body = r.json()
+                        if not isinstance(body, dict):
+                            raise ValueError("Graph $batch response is not a JSON object")
+                        responses = {
+                            resp.get("id"): resp
+                            for resp in body.get("responses", [])
+                            if isinstance(resp, dict)
+                        }
+                except (requests.RequestException, ValueError, TypeError) as e:
+                    # Transport, serialization or response-parsing failure:
+                    # record it against this chunk and carry on with the rest.
+                    for req_id in pending:
+                        results[int(req_id)] = _batch_result(None, str(e))
+                    break
+
+                if r.status_code != 200:
+                    error = _response_json(r)
+                    for req_id in pending:
+                        results[int(req_id)] = _batch_result(r.status_code, error)
+                    break
+
+                retry = {}
+                retry_after = 0.0
+                for req_id, req in pending.items():
+                    resp = responses.get(req_id, {})
+                    status = resp.get("status")
+                    if status in GRAPH_RETRY_STATUSES and attempt < GRAPH_MAX_RETRIES:
+                        headers = {k.lower(): v for k, v in (resp.get("headers") or {}).items()}
+                        try:
+                            retry_after = max(retry_after, float(headers.get("retry-after")))
+                        except (TypeError, ValueError):
+                            pass
+                        retry[req_id] = req
+                        continue
+                    results[int(req_id)] = _batch_result(status, resp.get("body"))
+
+                if not retry:
+                    break
+                if not _wait_for_retry(retry_after or None, attempt, deadline):
+                    # Out of retry budget: report the throttled ones as failed.
+                    for req_id in retry:
+                        resp = responses[req_id]
+                        results[int(req_id)] = _batch_result(resp.get("status"), resp.get("body"))
+                    break
+                pending = retry
+
+        failed = [(i, res) for i, res in enumerate(results) if not res["success"]]
+        if failed:
+            index, first = failed[0]
+            auth_failed = [res for _, res in failed if res["status_code"] in (401, 403)]
+            if auth_failed:
+                raise GraphAuthError(
+                    f"Graph auth error in batch: {len(failed)} of {len(results)} messages failed",
+                    auth_failed[0]["status_code"],
+                    auth_failed[0]["error"],
+                    results
+                )
+            raise GraphAPIError(
+                f"Graph sendMail failed for {len(failed)} of {len(results)} messages "
+                f"(first: #{index}, status {first['status_code']})",
+                first["status_code"],
+                first["error"],
+                results
+            )
+
+        return results
@@ -1,24 +1,134 @@
 import hashlib
+import os
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 
 
 class ICSValidationError(Exception):
     pass
 
 
+# Pure function of its parts; retries and resends hit the cache.
+@lru_cache(maxsize=4096)
 def stable_uid(*parts: str) -> str:
     base = "|".join([p.strip() for p in parts if p])
     digest = hashlib.sha256(base.encode("utf-8")).hexdigest()
     return f"{digest[:32]}@powerdashhr.com"
 
 
+def stable_uids_batch(parts_list: List[Tuple[str, ...]]) -> List[str]:
+    # Convenience wrapper: one stable_uid per tuple of parts, in order.
+    return [stable_uid(*parts) for parts in parts_list]
+
+
+def random_uid() -> str:
+    # UUID4-shaped (version/variant bits set) so existing UIDs and new ones
+    # look alike, without constructing a uuid.UUID object.
+    b = bytearray(os.urandom(16))
+    b[6] = (b[6] & 0x0F) | 0x40
+    b[8] = (b[8] & 0x3F) | 0x80
+    h = b.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
 def _fmt_dt(dt: datetime) -> str:
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)
     dt = dt.astimezone(timezone.utc)
-    return dt.strftime("%Y%m%dT%H%M%SZ")
+    return f"{dt.year:04d}{dt.month:02d}{dt.day:02d}T{dt.hour:02d}{dt.minute:02d}{dt.second:02d}Z"
+
+
+# (whole epoch second, formatted DTSTAMP); invites rendered within the
+# same second share one stamp. Swapped as a tuple so readers never see a
+# half-updated pair.
+_DTSTAMP_CACHE = (-1, "")
+
+
+def _dtstamp_now() -> str:
+    global _DTSTAMP_CACHE
+    now = int(time.time())
+    cached_at, stamp = _DTSTAMP_CACHE
+    if now != cached_at:
+        stamp = _fmt_dt(datetime.fromtimestamp(now, timezone.utc))
+        _DTSTAMP_CACHE = (now, stamp)
+    return stamp
+
+
+# RFC 5545 3.3.11 TEXT escaping; CRs are dropped so CRLF escapes as one newline.
+_ESCAPE = str.maketrans({"\\": "\\\\", ";": "\\;", ",": "\\,", "\n": "\\n", "\r": None})
+# Parameter values (CN=...) cannot be backslash-escaped; they are quoted
+# instead and may not contain DQUOTE or line breaks.
+_PARAM_CLEAN = str.maketrans({'"': "'", "\n": " ", "\r": None})
+
+
+def _esc(s: str) -> str:
+    return s.translate(_ESCAPE)
+
+
+def _param(s: str) -> str:
+    s = s.translate(_PARAM_CLEAN)
+    if ":" in s or ";" in s or "," in s:
+        return f'"{s}"'
+    return s
+
+
+def _fold(line: str) -> str:
+    # RFC 5545 3.1: content lines SHOULD NOT exceed 75 octets; continuation
+    # lines start with a single space.
+    if line.isascii():
+        if len(line) <= 75:
+            return line
+        return "\r\n ".join([line[:75]] + [line[i:i + 74] for i in range(75, len(line), 74)])
+
+    chunks = []
+    start = 0
+    size = 0
+    limit = 75
+    for i, ch in enumerate(line):
+        n = len(ch.encode("utf-8"))
+        if size + n > limit:
+            chunks.append(line[start:i])
+            start, size, limit = i, 0, 74
+        size += n
+    chunks.append(line[start:])
+    return "\r\n ".join(chunks)
+
+
+# Constant stretches of the VCALENDAR skeleton. to_ics joins these with the
+# per-invite values in one tuple, which avoids building a format dict.
+_ICS_HEAD = (
+    "BEGIN:VCALENDAR\r\n"
+    "PRODID:-//PowerDash HR//Interview Scheduler//EN\r\n"
+    "VERSION:2.0\r\n"
+    "METHOD:"
+)
+_ICS_EVENT_START = (
+    "\r\n"
+    "CALSCALE:GREGORIAN\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:"
+)
+_ICS_STATUS = (
+    "\r\n"
+    "SEQUENCE:0\r\n"
+    "STATUS:CONFIRMED\r\n"
+    "TRANSP:OPAQUE\r\n"
+)
+_ICS_TAIL = (
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+_VALARM_TEMPLATE = (
+    "BEGIN:VALARM\r\n"
+    "TRIGGER:-PT{minutes}M\r\n"
+    "ACTION:DISPLAY\r\n"
+    "DESCRIPTION:Reminder\r\n"
+    "END:VALARM\r\n"
+)
 
 
 @dataclass
@@ -33,6 +143,7 @@ class ICSInvite:
     start_utc: datetime
     end_utc: datetime
     method: str = "REQUEST"
+    alarm_minutes: Optional[int] = None
 
     def validate(self):
         if not self.uid:
@@ -51,42 +162,47 @@ class ICSInvite:
     def to_ics(self) -> str:
         self.validate()
 
-        dtstamp = _fmt_dt(datetime.now(timezone.utc))
+        dtstamp = _dtstamp_now()
         dtstart = _fmt_dt(self.start_utc)
         dtend = _fmt_dt(self.end_utc)
 
-        lines = [
-            "BEGIN:VCALENDAR",
-            "PRODID:-//PowerDash HR//Interview Scheduler//EN",
-            "VERSION:2.0",
-            f"METHOD:{self.method}",
-            "CALSCALE:GREGORIAN",
-            "BEGIN:VEVENT",
-            f"UID:{self.uid}",
-            f"DTSTAMP:{dtstamp}",
-            f"DTSTART:{dtstart}",
-            f"DTEND:{dtend}",
-            f"SUMMARY:{self.summary}",
-            f"DESCRIPTION:{self.description}",
-            f"LOCATION:{self.location}",
-            f"ORGANIZER;CN={self.organizer_name}:MAILTO:{self.organizer_email}",
-            "SEQUENCE:0",
-            "STATUS:CONFIRMED",
-            "TRANSP:OPAQUE",
-        ]
-
-        for a in self.attendees:
-            email = (a.get("email") or "").strip()
-            name = (a.get("name") or "").strip() or email
-            role = (a.get("role") or "REQ-PARTICIPANT").strip()
-
-            if email:
-                lines.append(
-                    f"ATTENDEE;CN={name};ROLE={role};PARTSTAT=NEEDS-ACTION;RSVP=TRUE:MAILTO:{email}"
-                )
-
-        lines += ["END:VEVENT", "END:VCALENDAR"]
-        return "\r\n".join(lines) + "\r\n"
+        # Attendees are read at render time, so edits after construction
+        # are picked up; those without an email are skipped.
+        attendee_block = "".join(
+            _fold(
+                f"ATTENDEE;CN={_param((a.get('name') or '').strip() or email)}"
+                f";ROLE={(a.get('role') or 'REQ-PARTICIPANT').strip()}"
+                f";PARTSTAT=NEEDS-ACTION;RSVP=TRUE:MAILTO:{email}"
+            ) + "\r\n"
+            for a in self.attendees
+            if (email := (a.get("email") or "").strip())
+        )
+
+        alarm = (
+            _VALARM_TEMPLATE.format(minutes=int(self.alarm_minutes))
+            if self.alarm_minutes is not None else ""
+        )
+
+        return "".join((
+            _ICS_HEAD, self.method,
+            _ICS_EVENT_START, self.uid,
+            "\r\nDTSTAMP:", dtstamp,
+            "\r\nDTSTART:", dtstart,
+            "\r\nDTEND:", dtend,
+            "\r\n", _fold("SUMMARY:" + _esc(self.summary)),
+            "\r\n", _fold("DESCRIPTION:" + _esc(self.description)),
+            "\r\n", _fold("LOCATION:" + _esc(self.location)),
+            "\r\n", _fold(f"ORGANIZER;CN={_param(self.organizer_name)}:MAILTO:{self.organizer_email}"),
+            _ICS_STATUS,
+            attendee_block,
+            alarm,
+            _ICS_TAIL,
+        ))
+
+    def to_ics_bytes(self) -> bytes:
+        # UTF-8 payload for email attachments; encoded in one pass since
+        # CN values may be non-ASCII.
+        return self.to_ics().encode("utf-8")
 
 
 def create_ics_from_interview(
@@ -121,3 +237,40 @@ def create_ics_from_interview(
     )
 
     return invite.to_ics()
+
+
+def build_meeting_invite_ics(
+    subject: str,
+    description: str,
+    start_utc: datetime,
+    end_utc: datetime,
+    organizer_email: str,
+    organizer_name: str,
+    required_attendees: List[str],
+    optional_attendees: Optional[List[str]] = None,
+    location: str = "",
+    alarm_minutes: Optional[int] = 15
+) -> bytes:
+    attendees = [{"email": e, "role": "REQ-PARTICIPANT"} for e in required_attendees]
+    attendees += [{"email": e, "role": "OPT-PARTICIPANT"} for e in (optional_attendees or [])]
+
+    invite = ICSInvite(
+        uid=random_uid(),
+        summary=subject,
+        description=description or "",
+        location=location or "",
+        organizer_email=organizer_email,
+        organizer_name=organizer_name or organizer_email,
+        attendees=attendees,
+        start_utc=start_utc,
+        end_utc=end_utc,
+        alarm_minutes=alarm_minutes
+    )
+
+    return invite.to_ics_bytes()
+
+
+def bulk_create_invites(rows: List[Dict]) -> List[bytes]:
+    # Each row takes create_ics_from_interview's keyword arguments; UIDs
+    # come from the cached stable_uid and DTSTAMP from the per-second cache.
+    return [create_ics_from_interview(**row).encode("utf-8") for row in rows]
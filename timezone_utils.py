@@ -147,6 +147,16 @@ def to_utc(dt_local: datetime) -> datetime:
     return dt_local.astimezone(timezone.utc)
 
 
+def ensure_utc(dt: datetime) -> datetime:
+    """
+    Return a timezone-aware UTC datetime.
+    Naive datetimes are assumed to already be UTC; aware ones are converted.
+    """
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
 def from_utc(dt_utc: datetime, tz_name: str) -> datetime:
     """
     Convert UTC datetime to local timezone.